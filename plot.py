@@ -4,11 +4,16 @@
 # In[ ]:
 
 
-import numpy as np  
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib
 get_ipython().run_line_magic('matplotlib', 'inline')
 
+# Let the renderer simplify long spectrum paths instead of drawing every
+# vertex; speeds up dense multi-mu intensity plots considerably.
+matplotlib.rcParams['path.simplify'] = True
+matplotlib.rcParams['path.simplify_threshold'] = 1.0
+
 
 # In[ ]:
 
@@ -35,19 +40,16 @@ if os.path.exists(file):
     flux_norm = data['flux_norm']
     
     plt.figure(figsize=(10, 6))
-    plt.plot(wave, flux_norm, label='Normalized Flux')
+    plt.plot(wave, flux_norm, label='Normalized Flux', rasterized=True)
     
     # If it's an intensity file, we can also plot specific mu angles
     if data['mode'] == 'Intensity':
         # Plot the first mu point intensity
         mu0 = data['mu_points'][0]
-        # Handle list or numpy array
-        try:
-             i_norm = data['intensity_norm'][mu0]
-        except:
-             i_norm = data['intensity_norm'][mu0]
-             
-        plt.plot(wave, i_norm, label=f'Intensity (mu={mu0:.2f})', alpha=0.7)
+        # intensity_norm_by_mu holds per-angle column views keyed by mu value.
+        i_norm = data['intensity_norm_by_mu'][mu0]
+
+        plt.plot(wave, i_norm, label=f'Intensity (mu={mu0:.2f})', alpha=0.7, rasterized=True)
 
     plt.xlabel('Wavelength (A)')
     plt.ylabel('Normalized Flux/Intensity')
@@ -1,8 +1,9 @@
-import csv
 import math
-from itertools import islice, product
+from functools import singledispatch
+from numbers import Real
 
 import numpy as np
+import pandas as pd
 import yaml
 
 
@@ -26,83 +27,170 @@ def _format_abundance_value(value):
     return value
 
 
+_RANGE_KEYS = frozenset({'min', 'max', 'step'})
+
+
+@singledispatch
+def _resolve(cfg, name, rng, fallback_count):
+    """Type-dispatched resolution of one parameter's configuration."""
+    raise ValueError(f"Unsupported configuration type for parameter '{name}'")
+
+
+@_resolve.register(str)
+@_resolve.register(Real)
+def _resolve_scalar(cfg, name, rng, fallback_count):
+    return [cfg]
+
+
+@_resolve.register(list)
+def _resolve_list(cfg, name, rng, fallback_count):
+    return cfg
+
+
+@_resolve.register(dict)
+def _resolve_dict(cfg, name, rng, fallback_count):
+    if 'values' in cfg:
+        return cfg['values'] if isinstance(cfg['values'], list) else [cfg['values']]
+    if _RANGE_KEYS <= cfg.keys():
+        # linspace with an explicit count avoids the float-drift
+        # off-by-one that arange(min, max + step, step) can produce.
+        num = int(round((cfg['max'] - cfg['min']) / cfg['step'])) + 1
+        return np.linspace(cfg['min'], cfg['max'], num)
+    if 'distribution' in cfg:
+        dist = cfg['distribution'] or {}
+        dist_type = dist.get('type', 'gaussian')
+        count = dist.get('count', fallback_count)
+        if count is None:
+            raise ValueError(f"Distribution for '{name}' requires a 'count' or sampling max_rows")
+        if dist_type == 'gaussian':
+            mean = dist.get('mean', 0.0)
+            sigma = dist.get('sigma', 0.1)
+            return rng.normal(mean, sigma, int(count))
+        if dist_type == 'uniform':
+            min_val = dist.get('min')
+            max_val = dist.get('max')
+            if min_val is None or max_val is None:
+                raise ValueError(f"Uniform distribution for '{name}' requires 'min' and 'max'")
+            return rng.uniform(min_val, max_val, int(count))
+        raise ValueError(f"Unsupported distribution type '{dist_type}' for parameter '{name}'")
+    raise ValueError(f"Could not parse configuration for parameter '{name}'")
+
+
 def _resolve_values(name, cfg, rng, is_abundance=False, fallback_count=None):
     """Return a list of values for a parameter from lists or distributions."""
     if cfg is None:
         cfg = DEFAULT_PARAMETER_CONFIG.get(name)
 
-    if isinstance(cfg, (str, float, int, np.floating)):
-        values = [cfg]
-    elif isinstance(cfg, list):
-        values = cfg
-    elif isinstance(cfg, dict):
-        if 'values' in cfg:
-            values = cfg['values'] if isinstance(cfg['values'], list) else [cfg['values']]
-        elif {'min', 'max', 'step'}.issubset(cfg):
-            values = np.arange(cfg['min'], cfg['max'] + cfg['step'], cfg['step'])
-        elif 'distribution' in cfg:
-            dist = cfg['distribution'] or {}
-            dist_type = dist.get('type', 'gaussian')
-            count = dist.get('count', fallback_count)
-            if count is None:
-                raise ValueError(f"Distribution for '{name}' requires a 'count' or sampling max_rows")
-            if rng is None:
-                rng = np.random.default_rng()
-            if dist_type == 'gaussian':
-                mean = dist.get('mean', 0.0)
-                sigma = dist.get('sigma', 0.1)
-                values = rng.normal(mean, sigma, int(count))
-            elif dist_type == 'uniform':
-                min_val = dist.get('min')
-                max_val = dist.get('max')
-                if min_val is None or max_val is None:
-                    raise ValueError(f"Uniform distribution for '{name}' requires 'min' and 'max'")
-                values = rng.uniform(min_val, max_val, int(count))
-            else:
-                raise ValueError(f"Unsupported distribution type '{dist_type}' for parameter '{name}'")
-        else:
-            raise ValueError(f"Could not parse configuration for parameter '{name}'")
-    else:
-        raise ValueError(f"Unsupported configuration type for parameter '{name}'")
+    values = _resolve(cfg, name, rng, fallback_count)
 
     if is_abundance:
+        arr = np.asarray(values)
+        if arr.dtype.kind in 'fiu':
+            # One vectorized C-level format call instead of one Python-level
+            # format per sampled value.
+            return list(np.char.mod('%+.2f', arr))
         return [_format_abundance_value(v) for v in values]
     return list(values)
 
 
 def _sample_parameter_space(parameter_lists, sampling_cfg, rng):
+    """Build the parameter combinations for the requested sampling method.
+
+    Returns a dict mapping parameter name to a flat 1D array with one entry
+    per output row; all methods are vectorized.
+    """
     method = (sampling_cfg or {}).get('method', 'full')
     max_rows = (sampling_cfg or {}).get('max_rows')
 
-    values_only = list(parameter_lists.values())
+    param_names = list(parameter_lists.keys())
+    values_only = [np.asarray(values) for values in parameter_lists.values()]
 
     if method == 'full':
-        combos = product(*values_only)
-        return islice(combos, max_rows) if max_rows else combos
+        # Build all combinations at once instead of looping over the Cartesian
+        # product row by row in Python.
+        grids = np.meshgrid(*values_only, indexing='ij')
+        columns = {name: grid.ravel() for name, grid in zip(param_names, grids)}
+        if max_rows:
+            columns = {name: col[: int(max_rows)] for name, col in columns.items()}
+        return columns
 
     if max_rows is None:
         raise ValueError(f"Sampling method '{method}' requires 'max_rows' to be set")
 
-    if rng is None:
-        rng = np.random.default_rng()
-
     if method == 'random':
-        return (tuple(rng.choice(values) for values in values_only) for _ in range(int(max_rows)))
+        # One C-level choice call per parameter instead of one per cell.
+        return {
+            name: rng.choice(values, size=int(max_rows), replace=True)
+            for name, values in zip(param_names, values_only)
+        }
 
     if method == 'latin_hypercube':
+        max_rows = int(max_rows)
         permutations = []
         for values in values_only:
             repeats = math.ceil(max_rows / len(values))
-            base_indices = np.tile(np.arange(len(values)), repeats)[: int(max_rows)]
-            permutations.append(np.asarray(base_indices)[rng.permutation(int(max_rows))])
+            base_indices = np.tile(np.arange(len(values)), repeats)[:max_rows]
+            permutations.append(base_indices[rng.permutation(max_rows)])
+        # One (max_rows, nparams) index matrix, gathered column by column in
+        # single fancy-index operations.
+        idx = np.stack(permutations, axis=1)
+        return {
+            name: values[idx[:, j]]
+            for j, (name, values) in enumerate(zip(param_names, values_only))
+        }
+
+    raise ValueError(f"Unsupported sampling method '{method}'")
 
-        def lhs_generator():
-            for row_idx in range(int(max_rows)):
-                yield tuple(values[idx_list[row_idx]] for values, idx_list in zip(values_only, permutations))
 
-        return lhs_generator()
+def _combinations_to_dataframe(parameter_combinations, header, constants):
+    """Assemble the output table from sampled column arrays plus constant columns.
 
-    raise ValueError(f"Unsupported sampling method '{method}'")
+    Every _sample_parameter_space method returns a columns dict, so this is
+    the only assembly path.
+    """
+    columns = parameter_combinations
+    data = dict(constants)
+    data.update({
+        'teff': np.asarray(columns['teff'], dtype=float).astype(int),
+        'logg': np.round(np.asarray(columns['logg'], dtype=float), 2),
+        'feh': np.round(np.asarray(columns['feh'], dtype=float), 2),
+        't_value': columns['t_value'],
+        'a': columns['a'],
+        'c': columns['c'],
+        'n': columns['n'],
+        'o': columns['o'],
+        'r': columns['r'],
+        's': columns['s'],
+    })
+    return pd.DataFrame(data, columns=header)
+
+
+def _write_grid_csv(df, output_path):
+    """Format every column in bulk and emit the CSV as one buffered write.
+
+    Numeric columns are printf-formatted with a single np.char.mod call each,
+    rows are fused with vectorized byte concatenation, and the whole table
+    goes out in a single write() instead of one formatting round-trip per row.
+    """
+    encoded = []
+    for name in df.columns:
+        col = df[name].to_numpy()
+        if col.dtype.kind in 'iu':
+            encoded.append(np.char.mod(b'%d', col))
+        else:
+            # astype('U') stringifies floats with the same shortest repr the
+            # csv module produced (e.g. '4.0', not '4').
+            encoded.append(np.char.encode(col.astype('U'), 'utf-8'))
+
+    rows = encoded[0]
+    for col in encoded[1:]:
+        rows = np.char.add(np.char.add(rows, b','), col)
+
+    # csv.writer terminates rows with \r\n; keep that byte format so grids
+    # produced before and after this writer diff/checksum identically.
+    header = ','.join(df.columns).encode('utf-8')
+    with open(output_path, 'wb', buffering=1 << 20) as f:
+        f.write(header + b'\r\n' + b'\r\n'.join(rows) + b'\r\n')
 
 
 def generate_grid(config_path='scripts/grid_config.yml', output_path='scripts/parameter_grid.csv'):
@@ -121,7 +209,10 @@ def generate_grid(config_path='scripts/grid_config.yml', output_path='scripts/pa
         return
 
     sampling_cfg = config.get('sampling', {})
-    rng = np.random.default_rng(sampling_cfg.get('seed')) if sampling_cfg.get('seed') is not None else None
+    # One rng threaded through all sampling: abundance-distribution draws and
+    # the grid sampler share a stream, so a seed makes the whole grid
+    # reproducible (and without one, OS entropy is read only once).
+    rng = np.random.default_rng(sampling_cfg.get('seed'))
     fallback_count = sampling_cfg.get('max_rows')
 
     atmosphere_cfg = config.get('atmosphere', {})
@@ -145,35 +236,36 @@ def generate_grid(config_path='scripts/grid_config.yml', output_path='scripts/pa
 
     parameter_combinations = _sample_parameter_space(parameter_lists, sampling_cfg, rng)
 
+    header = [
+        'grid_version', 'teff', 'logg', 'feh', 'lam_min', 'lam_max', 'lam_step',
+        'turbvel', 't_value', 'a', 'c', 'n', 'o', 'r', 's', 'output_mode', 'mode', 'calculation_mode'
+    ]
+    constants = {
+        'grid_version': grid_version,
+        'lam_min': lam_min,
+        'lam_max': lam_max,
+        'lam_step': lam_step,
+        'turbvel': turbvel,
+        'output_mode': output_mode,
+        'mode': mode,
+        'calculation_mode': calculation_mode,
+    }
+    output_format = str(config.get('output_format', 'csv')).lower()
+
     try:
-        with open(output_path, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow([
-                'grid_version', 'teff', 'logg', 'feh', 'lam_min', 'lam_max', 'lam_step',
-                'turbvel', 't_value', 'a', 'c', 'n', 'o', 'r', 's', 'output_mode', 'mode', 'calculation_mode'
-            ])
-
-            for teff, logg, feh, t_val, a_val, c_val, n_val, o_val, r_val, s_val in parameter_combinations:
-                writer.writerow([
-                    grid_version,
-                    int(teff),
-                    round(float(logg), 2),
-                    round(float(feh), 2),
-                    lam_min,
-                    lam_max,
-                    lam_step,
-                    turbvel,
-                    t_val,
-                    a_val,
-                    c_val,
-                    n_val,
-                    o_val,
-                    r_val,
-                    s_val,
-                    output_mode,
-                    mode,
-                    calculation_mode
-                ])
+        if output_format == 'parquet':
+            if output_path.endswith('.csv'):
+                output_path = output_path[:-4] + '.parquet'
+            df = _combinations_to_dataframe(parameter_combinations, header, constants)
+            try:
+                df.to_parquet(output_path, compression='zstd')
+            except ImportError:
+                print("Error: Parquet output requires the 'pyarrow' package")
+                return
+        else:
+            # Vectorized path: bulk-format the columns and write once.
+            df = _combinations_to_dataframe(parameter_combinations, header, constants)
+            _write_grid_csv(df, output_path)
         print(f"Successfully generated parameter grid at {output_path}")
     except IOError:
         print(f"Error: Could not write to output file {output_path}")
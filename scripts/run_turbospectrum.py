@@ -1,11 +1,14 @@
 import os
 import sys
+import math
 import subprocess
 import multiprocessing
 import time
-import glob
 import re
-import dataclasses
+import functools
+import hashlib
+import bisect
+import string
 from collections import Counter
 from dataclasses import dataclass, field
 from typing import List, Tuple, Optional, Dict, Iterator
@@ -17,6 +20,11 @@ from datetime import datetime
 # CONFIGURATION
 # =============================================================================
 
+# Computed once at import; these scripts are also a template users copy, so
+# keep the path derivation in one obvious place.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR) if os.path.basename(SCRIPT_DIR) == "scripts" else SCRIPT_DIR
+
 @dataclass
 class TurbospectrumConfig:
     # Paths
@@ -26,6 +34,7 @@ class TurbospectrumConfig:
     nlte: bool = False
     nlte_info_file: str = ""
     force: bool = False
+    verbose: bool = True
     
     # Input Directories (Absolute paths recommended)
     model_atmosphere_path: str = ""
@@ -46,12 +55,29 @@ class TurbospectrumConfig:
     calculate_intensity: bool = False
     mu_angles: List[float] = field(default_factory=list)
 
+    # Individual element abundances as {atomic_number: abundance}, applied to
+    # every grid point and emitted into both the babsma and bsyn input blocks.
+    individual_abundances: Dict[int, float] = field(default_factory=dict)
+
     # Synthesis Parameters
     lambda_min: float = 4000
     lambda_max: float = 8000
     lambda_step: float = 0.1
     model_opac_dir: str = "COM/contopac"
 
+    # Place scratch files (opacity tables, tmp_dir) on /dev/shm when it is
+    # writable, taking disk I/O off the babsma->bsyn critical path. Off by
+    # default: opacity tables for wide wavelength ranges can run to many GB
+    # and tmpfs space is taken from RAM.
+    use_tmpfs: bool = False
+
+    # Wavelength-parallel synthesis: split [lambda_min, lambda_max] into this
+    # many concurrent bsyn runs per grid point and stitch the outputs back
+    # together. Each chunk is padded by wavelength_chunk_overlap (Angstrom) on
+    # both sides so line wings reaching across a chunk edge are still included.
+    num_wavelength_chunks: int = 1
+    wavelength_chunk_overlap: float = 5.0
+
     # Grid Points
     # Format: [[Teff, logg, Fe/H, microturb_str], ...]
     grid_points: List[Tuple] = field(default_factory=list)
@@ -80,7 +106,19 @@ class TurbospectrumConfig:
             self.log_dir = os.path.join(self.project_root, "logs")
         if not self.tmp_dir:
             self.tmp_dir = os.path.join(self.project_root, "tmp")
-            
+
+        # Redirect scratch space to tmpfs if requested and actually available.
+        # model_opac_dir is joined onto project_root downstream, but join()
+        # yields the absolute path unchanged when the second part is absolute.
+        if self.use_tmpfs:
+            if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+                shm_root = os.path.join("/dev/shm", f"turbospectrum_{os.getuid()}")
+                self.tmp_dir = os.path.join(shm_root, "tmp")
+                self.model_opac_dir = os.path.join(shm_root, "contopac")
+            else:
+                print("Warning: use_tmpfs requested but /dev/shm is not writable; using disk paths")
+
+
         # Set executable paths
         exec_dir = os.path.join(self.project_root, f"exec-{self.compiler}")
         self.babsma_path = os.path.join(exec_dir, self.babsma_exec)
@@ -88,10 +126,16 @@ class TurbospectrumConfig:
         # Interpolator is usually in a separate directory
         self.interpol_path = os.path.join(self.project_root, "interpolator", self.interpol_exec)
 
-        print("\n--- Turbospectrum Configuration ---")
-        for key, value in dataclasses.asdict(self).items():
-            print(f"{key}: {value}")
-        print("-----------------------------------")
+        if self.verbose:
+            # Iterate __dict__ directly: asdict() deep-copies the whole
+            # dataclass, including a potentially huge grid_points list.
+            print("\n--- Turbospectrum Configuration ---")
+            for key, value in self.__dict__.items():
+                if key == "grid_points" and len(value) > 3:
+                    print(f"{key}: {len(value)} points, first={value[0]}, last={value[-1]}")
+                else:
+                    print(f"{key}: {value}")
+            print("-----------------------------------")
 
 
 
@@ -99,6 +143,45 @@ class TurbospectrumConfig:
 # LOGIC
 # =============================================================================
 
+def _map_grid_columns(fieldnames):
+    """Match required grid columns against the file's header, flexibly."""
+    # Try to find the right column names (case-insensitive, flexible)
+    # Map internal names to possible column names
+    col_mapping = {}
+
+    field_mappings = {
+        'teff': ['teff'],
+        'logg': ['logg'],
+        'feh': ['feh', 'fe_h', 'metallicity'],
+        'turb': ['turbvel', 't_value', 'turbulence', 'microturb']
+    }
+
+    for internal_name, possible_names in field_mappings.items():
+        found = False
+        # Try exact match first (case-sensitive)
+        for possible_name in possible_names:
+            if possible_name in fieldnames:
+                col_mapping[internal_name] = possible_name
+                found = True
+                break
+
+        # Try case-insensitive match if not found
+        if not found:
+            for possible_name in possible_names:
+                for col in fieldnames:
+                    if col.lower() == possible_name.lower():
+                        col_mapping[internal_name] = col
+                        found = True
+                        break
+                if found:
+                    break
+
+        if not found:
+            raise ValueError(f"Required column for '{internal_name}' not found in grid points file. "
+                           f"Tried: {possible_names}. Available columns: {fieldnames}")
+
+    return col_mapping
+
 def load_grid_points_from_csv(file_path: str, project_root: str = "") -> Iterator[Tuple]:
     """
     Load grid points from a CSV file in a memory-efficient way.
@@ -126,63 +209,44 @@ def load_grid_points_from_csv(file_path: str, project_root: str = "") -> Iterato
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Grid points file not found: {file_path}")
     
-    with open(file_path, 'r') as f:
+    if file_path.endswith('.parquet'):
+        # Parquet grids (see generate_grid's output_format option) are read
+        # via pandas; pyarrow is only required for this path.
+        import pandas as pd
+        df = pd.read_parquet(file_path)
+        col_mapping = _map_grid_columns(list(df.columns))
+        rows = zip(df[col_mapping['teff']], df[col_mapping['logg']],
+                   df[col_mapping['feh']], df[col_mapping['turb']])
+    else:
+        f = open(file_path, 'r')
         reader = csv.DictReader(f)
-        
-        # Try to find the right column names (case-insensitive, flexible)
-        # Map internal names to possible CSV column names
-        col_mapping = {}
-        
-        # Map each required field to possible column names
-        field_mappings = {
-            'teff': ['teff'],
-            'logg': ['logg'],
-            'feh': ['feh', 'fe_h', 'metallicity'],
-            'turb': ['turbvel', 't_value', 'turbulence', 'microturb']
-        }
-        
-        for internal_name, possible_names in field_mappings.items():
-            found = False
-            # Try exact match first (case-sensitive)
-            for possible_name in possible_names:
-                if possible_name in reader.fieldnames:
-                    col_mapping[internal_name] = possible_name
-                    found = True
-                    break
-            
-            # Try case-insensitive match if not found
-            if not found:
-                for possible_name in possible_names:
-                    for col in reader.fieldnames:
-                        if col.lower() == possible_name.lower():
-                            col_mapping[internal_name] = col
-                            found = True
-                            break
-                    if found:
-                        break
-            
-            if not found:
-                raise ValueError(f"Required column for '{internal_name}' not found in CSV file. "
-                               f"Tried: {possible_names}. Available columns: {reader.fieldnames}")
-        
-        for row in reader:
+        col_mapping = _map_grid_columns(reader.fieldnames)
+        rows = ((row[col_mapping['teff']], row[col_mapping['logg']],
+                 row[col_mapping['feh']], row[col_mapping['turb']]) for row in reader)
+
+    try:
+        for raw_teff, raw_logg, raw_feh, raw_turb in rows:
             try:
-                teff = int(float(row[col_mapping['teff']]))
-                logg = float(row[col_mapping['logg']])
-                feh = float(row[col_mapping['feh']])
-                t_value = str(row[col_mapping['turb']]).strip()
-                
+                teff = int(float(raw_teff))
+                logg = float(raw_logg)
+                feh = float(raw_feh)
+                t_value = str(raw_turb).strip()
+
                 # Format t_value to match expected format (e.g., "01", "02")
                 # Remove leading zeros if needed, but keep as string
                 if t_value.isdigit():
                     # Ensure it's zero-padded to 2 digits if it's a number
                     t_value = f"{int(t_value):02d}"
-                
+
                 yield (teff, logg, feh, t_value)
             except (ValueError, KeyError) as e:
                 # Skip invalid rows but warn
-                print(f"WARNING: Skipping invalid row in grid points file: {row}. Error: {e}")
+                print(f"WARNING: Skipping invalid row in grid points file: "
+                      f"{(raw_teff, raw_logg, raw_feh, raw_turb)}. Error: {e}")
                 continue
+    finally:
+        if not file_path.endswith('.parquet'):
+            f.close()
 
 def ensure_directories(config: TurbospectrumConfig):
     for path in [config.output_dir, config.log_dir, config.tmp_dir]:
@@ -192,20 +256,44 @@ def ensure_directories(config: TurbospectrumConfig):
     os.makedirs(opac_full_path, exist_ok=True)
 
 def create_linelist_file(config: TurbospectrumConfig) -> str:
-    """Creates a file containing the list of linelists to use."""
+    """Creates a file containing the list of linelists to use.
+
+    Skips the rewrite when the resolved contents are unchanged (tracked via a
+    content-hash sidecar), so repeated run_grid calls in one sweep do not keep
+    re-writing the same file.
+    """
     list_file_path = os.path.join(config.tmp_dir, "linelists.txt")
+
+    resolved_paths = []
+    for linelist in config.linelist_files:
+        # If it's an absolute path, use it. Otherwise join with linelist_path
+        if os.path.isabs(linelist):
+            resolved_paths.append(linelist)
+        else:
+            resolved_paths.append(os.path.join(config.linelist_path, linelist))
+    content = "\n".join(resolved_paths) + "\n" # Turbospectrum does not want quotes in the list file apparently
+
+    content_hash = hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+    hash_file_path = list_file_path + ".sha"
+    try:
+        if os.path.exists(list_file_path):
+            with open(hash_file_path, "r") as f:
+                if f.read().strip() == content_hash:
+                    return list_file_path
+    except OSError:
+        pass
+
     with open(list_file_path, "w") as f:
-        for linelist in config.linelist_files:
-            # If it's an absolute path, use it. Otherwise join with linelist_path
-            if os.path.isabs(linelist):
-                path = linelist
-            else:
-                path = os.path.join(config.linelist_path, linelist)
-            f.write(f"{path}\n") # Turbospectrum does not want quotes in the list file apparently
-            
+        f.write(content)
+    with open(hash_file_path, "w") as f:
+        f.write(content_hash)
+
     return list_file_path
 
+@functools.lru_cache(maxsize=4096)
 def get_model_filename(teff, logg, feh, turb_str):
+    # Grid points repeat across passes (flux + intensity runs, retries), so
+    # cache the assembled name per parameter tuple.
     # Construct the model filename based on the convention
     # Example: p2500_g+3.0_m0.0_t01_st_z+0.00_a+0.00_c+0.00_n+0.00_o+0.00_r+0.00_s+0.00.mod
     
@@ -215,67 +303,111 @@ def get_model_filename(teff, logg, feh, turb_str):
     filename = f"p{teff}_g{logg_str}_m0.0_t{turb_str}_st_z{feh_str}_a+0.00_c+0.00_n+0.00_o+0.00_r+0.00_s+0.00.mod"
     return filename
 
-class ModelInterpolator:
-    def __init__(self, config: TurbospectrumConfig):
-        self.config = config
-        self.available_models = []
-        self._scan_models()
+# Regex to parse model filenames, compiled once.
+# p2500_g+3.0_m0.0_t01_st_z+0.00_a+0.00_c+0.00_n+0.00_o+0.00_r+0.00_s+0.00.mod
+# We need to extract Teff, logg, FeH, and keep track of other params (turb, alpha, etc) to match
+# Assuming standard format
+_MODEL_FNAME_RE = re.compile(r"p(\d+)_g([+\-]\d+\.\d+)_m0\.0_t(\d+)_st_z([+\-]\d+\.\d+)_a([+\-]\d+\.\d+)_.*\.mod")
 
-    def _scan_models(self):
-        """Scans the model directory and parses filenames."""
-        pattern = os.path.join(self.config.model_atmosphere_path, "*.mod")
-        files = glob.glob(pattern)
-        
-        # Regex to parse filename
-        # p2500_g+3.0_m0.0_t01_st_z+0.00_a+0.00_c+0.00_n+0.00_o+0.00_r+0.00_s+0.00.mod
-        # We need to extract Teff, logg, FeH, and keep track of other params (turb, alpha, etc) to match
-        # Assuming standard format
-        regex = re.compile(r"p(\d+)_g([+\-]\d+\.\d+)_m0\.0_t(\d+)_st_z([+\-]\d+\.\d+)_a([+\-]\d+\.\d+)_.*\.mod")
-        
-        self.available_models = []
-        for f in files:
-            basename = os.path.basename(f)
-            match = regex.match(basename)
+@functools.lru_cache(maxsize=8)
+def _scan_model_dir(model_dir: str):
+    """Scans a model directory and parses filenames; cached per directory.
+
+    Uses os.scandir directly: DirEntry already carries the basename and full
+    path, so no extra stat or basename calls are needed (glob does both).
+    The returned list is shared between callers and must not be mutated.
+    """
+    available_models = []
+    with os.scandir(model_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.mod'):
+                continue
+            match = _MODEL_FNAME_RE.match(entry.name)
             if match:
-                teff = int(match.group(1))
-                logg = float(match.group(2))
-                turb = match.group(3)
-                feh = float(match.group(4))
-                alpha = float(match.group(5))
-                
-                self.available_models.append({
-                    'teff': teff,
-                    'logg': logg,
-                    'feh': feh,
-                    'turb': turb,
-                    'alpha': alpha,
-                    'path': f,
-                    'filename': basename
+                available_models.append({
+                    'teff': int(match.group(1)),
+                    'logg': float(match.group(2)),
+                    'feh': float(match.group(4)),
+                    'turb': match.group(3),
+                    'alpha': float(match.group(5)),
+                    'path': entry.path,
+                    'filename': entry.name
                 })
+    return available_models
+
+# Shared state handed to each pool worker once via the initializer: the
+# parsed model list (so workers do not re-scan the model directory per task),
+# the run configuration (so it is pickled once per worker, not per task), and
+# basename sets of pre-existing outputs/models (so existence checks are hash
+# probes instead of per-task stat calls).
+_WORKER_MODELS = None
+_WORKER_CONFIG = None
+_WORKER_EXISTING_OUTPUTS = None
+_WORKER_EXISTING_MODELS = None
+
+def _init_worker(available_models, config, existing_outputs=None, existing_models=None):
+    global _WORKER_MODELS, _WORKER_CONFIG, _WORKER_EXISTING_OUTPUTS, _WORKER_EXISTING_MODELS
+    _WORKER_MODELS = available_models
+    _WORKER_CONFIG = config
+    _WORKER_EXISTING_OUTPUTS = existing_outputs
+    _WORKER_EXISTING_MODELS = existing_models
+    # Pre-touch the Fortran executables so the OS page cache is warm before
+    # the first task: they are exec'd once per grid point, and the first
+    # cold read from a networked filesystem can otherwise stall every worker.
+    for exe in (config.babsma_path, config.bsyn_path):
+        try:
+            with open(exe, 'rb') as f:
+                while f.read(1 << 20):
+                    pass
+        except OSError:
+            pass
+
+class ModelInterpolator:
+    def __init__(self, config: TurbospectrumConfig, available_models=None):
+        self.config = config
+        if available_models is not None:
+            self.available_models = available_models
+        else:
+            self.available_models = _scan_model_dir(self.config.model_atmosphere_path)
+        self._build_index()
+
+    def _build_index(self):
+        """Index models by turbulence: sorted grid axes plus an O(1) path lookup."""
+        self._by_turb = {}
+        for m in self.available_models:
+            index = self._by_turb.setdefault(m['turb'], {
+                'teffs': set(), 'loggs': set(), 'fehs': set(), 'path_index': {}
+            })
+            index['teffs'].add(m['teff'])
+            index['loggs'].add(m['logg'])
+            index['fehs'].add(m['feh'])
+            index['path_index'][(m['teff'], round(m['logg'], 2), round(m['feh'], 2))] = m['path']
+        for index in self._by_turb.values():
+            index['teffs'] = sorted(index['teffs'])
+            index['loggs'] = sorted(index['loggs'])
+            index['fehs'] = sorted(index['fehs'])
 
     def find_bracketing_models(self, target_teff, target_logg, target_feh, target_turb):
         """Finds the 8 bracketing models for interpolation."""
-        # Filter by turbulence (must match)
+        # Filter by turbulence (must match) via the prebuilt index
         # We assume alpha is 0.0 for now or matches target if we had target alpha
-        candidates = [m for m in self.available_models if m['turb'] == target_turb]
-        
-        if not candidates:
+        index = self._by_turb.get(target_turb)
+
+        if not index:
             return None, "No models found with matching turbulence"
 
-        # Get unique grid points
-        teffs = sorted(list(set(m['teff'] for m in candidates)))
-        loggs = sorted(list(set(m['logg'] for m in candidates)))
-        fehs = sorted(list(set(m['feh'] for m in candidates)))
-        
-        # Helper to find bracket
+        # Unique grid points, already sorted at index build time
+        teffs = index['teffs']
+        loggs = index['loggs']
+        fehs = index['fehs']
+
+        # Helper to find bracket; values are already sorted by _build_index,
+        # so a binary search replaces the linear scan.
         def get_bracket(values, target):
-            values = sorted(values)
             if target <= values[0]: return values[0], values[1]
             if target >= values[-1]: return values[-2], values[-1]
-            for i in range(len(values)-1):
-                if values[i] <= target < values[i+1]:
-                    return values[i], values[i+1]
-            return values[0], values[1] # Should not happen
+            i = bisect.bisect_right(values, target) - 1
+            return values[i], values[i+1]
 
         t1, t2 = get_bracket(teffs, target_teff)
         g1, g2 = get_bracket(loggs, target_logg)
@@ -288,15 +420,16 @@ class ModelInterpolator:
         # (t2, g1, z1), (t2, g1, z2), (t2, g2, z1), (t2, g2, z2)
         
         brackets = []
+        path_index = index['path_index']
         for t in [t1, t2]:
             for g in [g1, g2]:
                 for z in [z1, z2]:
-                    # Find the specific model file
-                    match = next((m for m in candidates if m['teff'] == t and abs(m['logg'] - g) < 0.01 and abs(m['feh'] - z) < 0.01), None)
-                    if not match:
+                    # Direct hash lookup instead of a linear scan per corner
+                    path = path_index.get((t, round(g, 2), round(z, 2)))
+                    if path is None:
                         return None, f"Missing grid point: Teff={t}, logg={g}, FeH={z}"
-                    brackets.append(match['path'])
-                    
+                    brackets.append(path)
+
         return brackets, None
 
     def interpolate(self, teff, logg, feh, turb_str, output_path):
@@ -319,39 +452,216 @@ class ModelInterpolator:
         # .false.
         # ''
         
-        input_str = ""
-        for b in brackets:
-            input_str += f"'{b}'\n"
-            
         alt_path = os.path.join(self.config.tmp_dir, os.path.basename(output_path) + ".alt")
+
+        input_lines = [f"'{b}'" for b in brackets]
+        input_lines += [
+            f"'{output_path}'",
+            f"'{alt_path}'",
+            f"{teff}",
+            f"{logg}",
+            f"{feh}",
+            ".false.", # optimize?
+            ".false.", # some other flag?
+            "''",
+        ]
+        input_str = "\n".join(input_lines) + "\n"
         
-        input_str += f"'{output_path}'\n"
-        input_str += f"'{alt_path}'\n"
-        input_str += f"{teff}\n"
-        input_str += f"{logg}\n"
-        input_str += f"{feh}\n"
-        input_str += ".false.\n" # optimize?
-        input_str += ".false.\n" # some other flag?
-        input_str += "''\n"
-        
+        # Write interpol_modeles output straight to a log file instead of a
+        # pipe, so the parent never buffers or copies the chatter; the log is
+        # only read back when the run fails.
+        interpol_log = os.path.join(self.config.log_dir,
+                                    os.path.basename(output_path) + ".interpol.log")
         try:
-            process = subprocess.run(
-                [self.config.interpol_path],
-                input=input_str,
-                text=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                cwd=self.config.project_root
-            )
+            # See run_single_synthesis: chdir instead of cwd= keeps the
+            # posix_spawn fast path available.
+            if os.getcwd() != os.path.abspath(self.config.project_root):
+                os.chdir(self.config.project_root)
+            with open(interpol_log, "w") as log:
+                process = subprocess.run(
+                    [self.config.interpol_path],
+                    input=input_str,
+                    text=True,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    close_fds=False
+                )
             if process.returncode != 0:
-                return False, f"Interpolation failed:\n{process.stdout}"
+                with open(interpol_log, "r") as log:
+                    return False, f"Interpolation failed:\n{log.read()}"
         except Exception as e:
             return False, f"Interpolation execution error: {e}"
             
         return True, "Success"
 
-def run_single_synthesis(args):
-    params, config = args
+@functools.lru_cache(maxsize=4)
+def _get_interpolator(model_dir: str, interpol_path: str) -> ModelInterpolator:
+    """Build the interpolator once per worker process.
+
+    The object carries the full model index, so reconstructing it for every
+    missing model is wasteful on interpolation-heavy grids. Keyed on the
+    paths that determine its contents; the actual state comes from the
+    worker globals set by _init_worker.
+    """
+    return ModelInterpolator(_WORKER_CONFIG, available_models=_WORKER_MODELS)
+
+def _wavelength_chunks(lambda_min, lambda_max, lambda_step, num_chunks, overlap):
+    """Split [lambda_min, lambda_max] into num_chunks sub-intervals.
+
+    All boundaries are snapped onto the lambda_min + n*lambda_step lattice:
+    bsyn generates its grid as XL1 + (J-1)*DEL from whatever LAMBDA_MIN it is
+    handed, so a chunk starting off-lattice would sample at fractional
+    offsets from the unchunked grid. Splitting the lattice point indices
+    instead guarantees the union of the trimmed chunks reproduces the
+    single-run sampling exactly, endpoint included.
+
+    Returns a list of (lo, hi, padded_lo, padded_hi) tuples. [lo, hi) is the
+    half-open interval a chunk contributes to the stitched output; the padded
+    bounds (clamped to the full range) are what bsyn is actually run with so
+    line wings crossing a chunk edge are synthesized correctly.
+    """
+    num_points = int(math.floor((lambda_max - lambda_min) / lambda_step + 1e-9)) + 1
+    pad_steps = int(math.ceil(overlap / lambda_step))
+    chunks = []
+    for k in range(num_chunks):
+        n_lo = (k * num_points) // num_chunks
+        n_hi = num_points if k == num_chunks - 1 else ((k + 1) * num_points) // num_chunks
+        lo = lambda_min + n_lo * lambda_step
+        hi = lambda_min + n_hi * lambda_step
+        padded_lo = lambda_min + max(0, n_lo - pad_steps) * lambda_step
+        padded_hi = min(lambda_max, lambda_min + (n_hi - 1 + pad_steps) * lambda_step)
+        chunks.append((lo, hi, padded_lo, padded_hi))
+    return chunks
+
+def _stitch_chunk_outputs(chunk_results, result_file, lambda_step):
+    """Concatenate per-chunk bsyn outputs into result_file, trimming overlap.
+
+    chunk_results is a list of (path, lo, hi) in wavelength order; each line
+    is kept only if its wavelength falls inside the chunk's own [lo, hi)
+    interval. The comparison uses a half-step tolerance, which assigns every
+    point to its nearest lattice interval so float noise at a seam can
+    neither duplicate nor drop the boundary point; the last chunk also keeps
+    any trailing points below lambda_max that sit past its nominal edge.
+    Header lines are taken from the first chunk only.
+    """
+    tol = lambda_step / 2.0
+    with open(result_file, 'w') as out:
+        for k, (path, lo, hi) in enumerate(chunk_results):
+            is_last = k == len(chunk_results) - 1
+            with open(path, 'r') as f:
+                for line in f:
+                    stripped = line.strip()
+                    if stripped.startswith('#'):
+                        if k == 0:
+                            out.write(line)
+                        continue
+                    if not stripped:
+                        continue
+                    try:
+                        wavelength = float(stripped.split(None, 1)[0])
+                    except ValueError:
+                        continue
+                    if wavelength >= lo - tol and (wavelength < hi - tol or is_last):
+                        out.write(line)
+            os.remove(path)
+
+@functools.lru_cache(maxsize=256)
+def _model_header_is_marcs(abs_path: str, mtime: float) -> bool:
+    """Check whether a model file is a native MARCS model (vs interpolated).
+
+    Cached on (path, mtime) so repeated run_grid passes over the same models
+    (e.g. a flux run followed by an intensity run) only read each header once
+    per worker.
+    """
+    try:
+        with open(abs_path, 'r') as f:
+            return "INTERPOL" not in f.readline()
+    except OSError:
+        return True # Assume MARCS if read fails? Or fail later.
+
+def _model_is_marcs(model_path: str) -> bool:
+    try:
+        mtime = os.path.getmtime(model_path)
+    except OSError:
+        mtime = 0.0
+    return _model_header_is_marcs(os.path.abspath(model_path), mtime)
+
+# Fortran stdin blocks as module-level templates: parsed once at import,
+# one substitute() call per grid point instead of rebuilding a large f-string.
+_BABSMA_TEMPLATE = string.Template("""'LAMBDA_MIN:'  '$lambda_min'
+'LAMBDA_MAX:'  '$lambda_max'
+'LAMBDA_STEP:' '$lambda_step'
+'MODELINPUT:' '$model_path'
+'MARCS-FILE:' '$marcs_flag'
+'MODELOPAC:' '$opac_path'
+'ABUND_SOURCE:' 'magg'
+'METALLICITY:'    '$feh'
+'ALPHA/Fe   :'    '0.00'
+'HELIUM     :'    '0.00'
+'R-PROCESS  :'    '0.00'
+'S-PROCESS  :'    '0.00'
+'INDIVIDUAL ABUNDANCES:'   '$n_abund'$abund_block
+'XIFIX:' 'T'
+$turb_val
+""")
+
+_BSYN_TEMPLATE = string.Template("""'NLTE :'          '$nlte_flag'
+'NLTEINFOFILE:'  '$nlte_info_file'
+'LAMBDA_MIN:'     '$lambda_min'
+'LAMBDA_MAX:'     '$lambda_max'
+'LAMBDA_STEP:'    '$lambda_step'
+'INTENSITY/FLUX:' '$mode_str'
+'MODELOPAC:' '$opac_path'
+'RESULTFILE :' '$result_file'
+'ABUND_SOURCE:'   'magg'
+'METALLICITY:'    '$feh'
+'ALPHA/Fe   :'    '0.00'
+'HELIUM     :'    '0.00'
+'R-PROCESS  :'    '0.00'
+'S-PROCESS  :'    '0.00'
+'INDIVIDUAL ABUNDANCES:'   '$n_abund'$abund_block
+'ISOTOPES : ' '0'
+'LIST_OF_LINELISTS:' '$linelist_file_path'
+'SPHERICAL:'  'F'
+  30
+  300.00
+  15
+  $turb_val
+""")
+
+def _abundance_block(individual_abundances):
+    """Render the INDIVIDUAL ABUNDANCES count and 'Z value' lines.
+
+    Returns (count, block) where block is empty or starts with a newline so
+    it can sit directly after the count line in the templates. Entries are
+    emitted sorted by atomic number with a single join.
+    """
+    if not individual_abundances:
+        return 0, ""
+    items = sorted(individual_abundances.items())
+    return len(items), "\n" + "\n".join(f"{int(z)}  {float(v):.2f}" for z, v in items)
+
+@functools.lru_cache(maxsize=32)
+def _static_babsma_template(lambda_min, lambda_max, lambda_step):
+    """Pre-render the babsma block fields that are constant across a run,
+    leaving only the per-grid-point placeholders to substitute."""
+    return string.Template(_BABSMA_TEMPLATE.safe_substitute(
+        lambda_min=lambda_min, lambda_max=lambda_max, lambda_step=lambda_step))
+
+@functools.lru_cache(maxsize=32)
+def _static_bsyn_template(nlte_flag, nlte_info_file, lambda_step, mode_str, linelist_file_path):
+    """Same partial-evaluation trick for the bsyn block: the NLTE/mode/
+    linelist fields never change within a run."""
+    return string.Template(_BSYN_TEMPLATE.safe_substitute(
+        nlte_flag=nlte_flag, nlte_info_file=nlte_info_file,
+        lambda_step=lambda_step, mode_str=mode_str,
+        linelist_file_path=linelist_file_path))
+
+def run_single_synthesis(params, config: Optional[TurbospectrumConfig] = None):
+    # Pool workers read the config from the initializer global; serial callers
+    # can still pass it explicitly.
+    if config is None:
+        config = _WORKER_CONFIG
     teff, logg, feh, turb_str = params
 
     def build_result(status: str, message: str):
@@ -376,6 +686,14 @@ def run_single_synthesis(args):
     except:
         turb_val = 1.0 # Default fallback
 
+    # Run from the project root so relative paths in the Fortran codes work.
+    # chdir once per worker rather than passing cwd= to every subprocess call:
+    # together with close_fds=False this lets CPython launch the children via
+    # posix_spawn instead of fork+exec, skipping the page-table copy of a
+    # worker that may hold large grids in memory.
+    if os.getcwd() != os.path.abspath(config.project_root):
+        os.chdir(config.project_root)
+
     model_file = get_model_filename(teff, logg, feh, turb_str)
     model_path = os.path.join(config.model_atmosphere_path, model_file)
     
@@ -392,20 +710,36 @@ def run_single_synthesis(args):
         expected_outputs.append(os.path.join(config.output_dir, f"{base_name}.spec"))
 
     if not config.force:
+        # Membership in the directory listing taken once at run start replaces
+        # a stat call per expected output; fall back to stat when running
+        # outside a pool (no snapshot available).
         all_exist = True
         for f in expected_outputs:
-            if not os.path.exists(f):
+            if _WORKER_EXISTING_OUTPUTS is not None:
+                exists = os.path.basename(f) in _WORKER_EXISTING_OUTPUTS
+            else:
+                exists = os.path.exists(f)
+            if not exists:
                 all_exist = False
                 break
         if all_exist:
             return build_result("skipped", "Output already exists")
-    
-    # Check if model exists, if not try to interpolate
-    if not os.path.exists(model_path):
-        # Initialize interpolator (this might be expensive to do every time, but safe for multiprocessing)
-        # Alternatively, pass an initialized interpolator if it was picklable (files list might be large?)
-        # Scanning directory is fast enough.
-        interpolator = ModelInterpolator(config)
+
+    # Check if model exists, if not try to interpolate. A model absent from
+    # the start-of-run snapshot may have been interpolated by another worker
+    # in the meantime, so confirm with a stat before interpolating.
+    if _WORKER_EXISTING_MODELS is not None and model_file in _WORKER_EXISTING_MODELS:
+        model_missing = False
+    else:
+        model_missing = not os.path.exists(model_path)
+    if model_missing:
+        # Reuse one interpolator per worker (its model index is expensive to
+        # rebuild); outside a pool there are no worker globals, so construct
+        # it directly from the passed config.
+        if _WORKER_CONFIG is not None:
+            interpolator = _get_interpolator(config.model_atmosphere_path, config.interpol_path)
+        else:
+            interpolator = ModelInterpolator(config, available_models=_WORKER_MODELS)
         success, message = interpolator.interpolate(teff, logg, feh, turb_str, model_path)
         if not success:
             return build_result("error", f"Model missing and interpolation failed: {message}")
@@ -413,17 +747,8 @@ def run_single_synthesis(args):
             # Log interpolation success?
             pass
 
-    # Check if model is a standard MARCS model or interpolated
-    is_marcs = True
-    try:
-        with open(model_path, 'r') as f:
-            first_line = f.readline()
-            if "INTERPOL" in first_line:
-                is_marcs = False
-    except:
-        pass # Assume MARCS if read fails? Or fail later.
-
-    marcs_flag = '.true.' if is_marcs else '.false.'
+    marcs_flag = '.true.' if _model_is_marcs(model_path) else '.false.'
+    n_abund, abund_block = _abundance_block(config.individual_abundances)
 
     with open(log_file, "w") as log:
         log.write(f"Starting synthesis for {base_name}\n")
@@ -431,34 +756,30 @@ def run_single_synthesis(args):
         # ---------------------------------------------------------------------
         # Step 1: BABSMA (Continuous Opacity)
         # ---------------------------------------------------------------------
-        babsma_input = f"""'LAMBDA_MIN:'  '{config.lambda_min}'
-'LAMBDA_MAX:'  '{config.lambda_max}'
-'LAMBDA_STEP:' '{config.lambda_step}'
-'MODELINPUT:' '{model_path}'
-'MARCS-FILE:' '{marcs_flag}'
-'MODELOPAC:' '{opac_path}'
-'ABUND_SOURCE:' 'magg'
-'METALLICITY:'    '{feh}'
-'ALPHA/Fe   :'    '0.00'
-'HELIUM     :'    '0.00'
-'R-PROCESS  :'    '0.00'
-'S-PROCESS  :'    '0.00'
-'INDIVIDUAL ABUNDANCES:'   '0'
-'XIFIX:' 'T'
-{turb_val}
-"""
+        babsma_input = _static_babsma_template(
+            config.lambda_min, config.lambda_max, config.lambda_step
+        ).substitute(
+            model_path=model_path,
+            marcs_flag=marcs_flag,
+            opac_path=opac_path,
+            feh=feh,
+            turb_val=turb_val,
+            n_abund=n_abund,
+            abund_block=abund_block,
+        )
         log.write("\n--- BABSMA INPUT ---\n")
         log.write(babsma_input)
         log.write("\n--------------------\n")
         
         try:
+            # Feed stdin as pre-encoded bytes; the child writes straight to the
+            # log fd, so no text-mode wrapping is needed anywhere.
             process = subprocess.run(
                 [config.babsma_path],
-                input=babsma_input,
-                text=True,
+                input=babsma_input.encode(),
                 stdout=log,
                 stderr=subprocess.STDOUT,
-                cwd=config.project_root # Run from root so relative paths in Fortran work if needed
+                close_fds=False
             )
             if process.returncode != 0:
                 return build_result("error", "babsma failed")
@@ -487,35 +808,96 @@ def run_single_synthesis(args):
                 'suffix': ""
             })
 
+        def make_bsyn_input(lam_lo, lam_hi, bsyn_result_file):
+            template = _static_bsyn_template(
+                '.true.' if config.nlte else '.false.',
+                config.nlte_info_file if config.nlte_info_file else 'DATA/SPECIES_LTE_NLTE.dat',
+                config.lambda_step,
+                mode_str,
+                config.linelist_file_path,
+            )
+            return template.substitute(
+                lambda_min=lam_lo,
+                lambda_max=lam_hi,
+                opac_path=opac_path,
+                result_file=bsyn_result_file,
+                feh=feh,
+                turb_val=f"{turb_val:.2f}",
+                n_abund=n_abund,
+                abund_block=abund_block,
+            )
+
         for run in synthesis_runs:
             mode_str = run['mode']
             suffix = run['suffix']
-            
+
             current_result_file = os.path.join(config.output_dir, f"{base_name}{suffix}.spec")
-            
-            bsyn_input = f"""'NLTE :'          '{'.true.' if config.nlte else '.false.'}'
-'NLTEINFOFILE:'  '{config.nlte_info_file if config.nlte_info_file else 'DATA/SPECIES_LTE_NLTE.dat'}'
-'LAMBDA_MIN:'     '{config.lambda_min}'
-'LAMBDA_MAX:'     '{config.lambda_max}'
-'LAMBDA_STEP:'    '{config.lambda_step}'
-'INTENSITY/FLUX:' '{mode_str}'
-'MODELOPAC:' '{opac_path}'
-'RESULTFILE :' '{current_result_file}'
-'ABUND_SOURCE:'   'magg'
-'METALLICITY:'    '{feh}'
-'ALPHA/Fe   :'    '0.00'
-'HELIUM     :'    '0.00'
-'R-PROCESS  :'    '0.00'
-'S-PROCESS  :'    '0.00'
-'INDIVIDUAL ABUNDANCES:'   '0'
-'ISOTOPES : ' '0'
-'LIST_OF_LINELISTS:' '{config.linelist_file_path}'
-'SPHERICAL:'  'F'
-  30
-  300.00
-  15
-  {turb_val:.2f}
-"""
+
+            if config.num_wavelength_chunks > 1:
+                # Split the wavelength range into independent bsyn runs and
+                # execute them concurrently; bsyn is serial internally, so this
+                # is the only way to parallelize a single synthesis.
+                chunks = _wavelength_chunks(
+                    config.lambda_min, config.lambda_max, config.lambda_step,
+                    config.num_wavelength_chunks, config.wavelength_chunk_overlap
+                )
+                procs = []
+                try:
+                    for k, (lo, hi, padded_lo, padded_hi) in enumerate(chunks):
+                        chunk_result = os.path.join(config.tmp_dir, f"{base_name}{suffix}.chunk{k}.spec")
+                        chunk_log = open(os.path.join(config.log_dir, f"{base_name}{suffix}.chunk{k}.log"), "w")
+                        bsyn_input = make_bsyn_input(padded_lo, padded_hi, chunk_result)
+                        chunk_log.write(f"--- BSYN INPUT ({mode_str}, chunk {k}) ---\n")
+                        chunk_log.write(bsyn_input)
+                        chunk_log.write("\n------------------\n")
+                        chunk_log.flush()
+                        process = subprocess.Popen(
+                            [config.bsyn_path],
+                            stdin=subprocess.PIPE,
+                            stdout=chunk_log,
+                            stderr=subprocess.STDOUT,
+                            close_fds=False
+                        )
+                        process.stdin.write(bsyn_input.encode())
+                        process.stdin.close()
+                        procs.append((process, chunk_log, chunk_result, lo, hi))
+                except Exception as e:
+                    for process, chunk_log, _, _, _ in procs:
+                        process.kill()
+                        chunk_log.close()
+                    return build_result("exception", f"bsyn execution failed: {e}")
+
+                failed = False
+                for process, chunk_log, _, _, _ in procs:
+                    process.wait()
+                    chunk_log.close()
+                    if process.returncode != 0:
+                        failed = True
+
+                def _remove_chunk_results():
+                    for _, _, chunk_result, _, _ in procs:
+                        try:
+                            os.remove(chunk_result)
+                        except OSError:
+                            pass
+
+                if failed:
+                    _remove_chunk_results()
+                    return build_result("error", f"bsyn failed ({mode_str})")
+
+                log.write(f"\n--- BSYN ({mode_str}) ran as {len(procs)} wavelength chunks, see chunk logs ---\n")
+                try:
+                    _stitch_chunk_outputs([(r, lo, hi) for _, _, r, lo, hi in procs],
+                                          current_result_file, config.lambda_step)
+                except Exception as e:
+                    # A chunk result can be missing even with exit code 0
+                    # (Fortran STOP exits 0 on many error paths); keep the
+                    # failure contained to this grid point.
+                    _remove_chunk_results()
+                    return build_result("error", f"bsyn chunk stitching failed ({mode_str}): {e}")
+                continue
+
+            bsyn_input = make_bsyn_input(config.lambda_min, config.lambda_max, current_result_file)
             log.write(f"\n--- BSYN INPUT ({mode_str}) ---\n")
             log.write(bsyn_input)
             log.write("\n------------------\n")
@@ -523,11 +905,10 @@ def run_single_synthesis(args):
             try:
                 process = subprocess.run(
                     [config.bsyn_path],
-                    input=bsyn_input,
-                    text=True,
+                    input=bsyn_input.encode(),
                     stdout=log,
                     stderr=subprocess.STDOUT,
-                    cwd=config.project_root
+                    close_fds=False
                 )
                 if process.returncode != 0:
                     return build_result("error", f"bsyn failed ({mode_str})")
@@ -536,54 +917,82 @@ def run_single_synthesis(args):
 
     return build_result("success", "Synthesis complete")
 
-def run_grid(config: TurbospectrumConfig, grid_points: List[Tuple]):
+def run_grid(config: TurbospectrumConfig, grid_points):
     """
-    Runs the Turbospectrum synthesis for a given configuration and list of grid points.
+    Runs the Turbospectrum synthesis for a given configuration and iterable of
+    grid points. Accepts any iterable (e.g. the CSV loader's generator) and
+    streams it to the workers without materializing all points up front.
     """
     ensure_directories(config)
-    
+
     # Create the linelist file once
     config.linelist_file_path = create_linelist_file(config)
-    
+
     print(f"Running Turbospectrum in {config.project_root}")
     print(f"Output directory: {config.output_dir}")
-    print(f"Number of grid points: {len(grid_points)}")
-    
-    # Prepare arguments for parallel execution
-    # We pass config to each worker
-    tasks = [(point, config) for point in grid_points]
-    
+    try:
+        num_points = len(grid_points)
+        print(f"Number of grid points: {num_points}")
+    except TypeError:
+        num_points = None
+
+    # Only the small parameter tuples travel through the task queue; the
+    # config goes to each worker once via the pool initializer below.
+    tasks = iter(grid_points)
+
     # Determine number of CPUs
     num_cpus = multiprocessing.cpu_count()
     print(f"Using {num_cpus} CPUs")
-    
+
     start_time = time.time()
-    
-    with multiprocessing.Pool(processes=num_cpus) as pool:
-        results = pool.map(run_single_synthesis, tasks)
-        
+
+    # Submit in chunks so each worker picks up several grid points per IPC
+    # round-trip instead of the default chunksize of 1. For unsized iterables
+    # fall back to a small fixed chunk so work still starts immediately.
+    chunksize = max(1, num_points // (num_cpus * 4)) if num_points else 4
+
+    # Scan the model directory once here rather than per missing model in the
+    # workers; the parsed list rides into each worker via the initializer.
+    available_models = _scan_model_dir(config.model_atmosphere_path) \
+        if os.path.isdir(config.model_atmosphere_path) else []
+
+    # Snapshot the output and model directories once so workers can answer
+    # "does this file exist?" with a set lookup instead of a stat call.
+    existing_outputs = frozenset(os.listdir(config.output_dir)) \
+        if os.path.isdir(config.output_dir) else frozenset()
+    existing_models = frozenset(os.listdir(config.model_atmosphere_path)) \
+        if os.path.isdir(config.model_atmosphere_path) else frozenset()
+
+    # imap_unordered yields results as workers finish them: progress shows up
+    # immediately and slow (e.g. interpolated) points do not stall reporting
+    # of the fast ones.
+    results = []
+    summary_lines = []
+    with multiprocessing.Pool(processes=num_cpus, initializer=_init_worker,
+                              initargs=(available_models, config,
+                                        existing_outputs, existing_models)) as pool:
+        for res in pool.imap_unordered(run_single_synthesis, tasks, chunksize=chunksize):
+            params = res["params"]
+            line = (
+                f"{res['status'].upper():<9} {res['base_name']} "
+                f"(Teff={params['teff']}, logg={params['logg']}, FeH={params['feh']}, turb={params['turb']}): "
+                f"{res['message']}"
+            )
+            print(line, flush=True)
+            summary_lines.append(line)
+            results.append(res)
+
     end_time = time.time()
 
     # Report results
     print("\n--- Summary ---")
     status_counts = Counter(res["status"] for res in results)
-    summary_lines = []
-
-    for res in results:
-        params = res["params"]
-        line = (
-            f"{res['status'].upper():<9} {res['base_name']} "
-            f"(Teff={params['teff']}, logg={params['logg']}, FeH={params['feh']}, turb={params['turb']}): "
-            f"{res['message']}"
-        )
-        print(line)
-        summary_lines.append(line)
 
-    print(f"\nCompleted {status_counts.get('success', 0)}/{len(grid_points)} calculations in {end_time - start_time:.2f} seconds.")
+    print(f"\nCompleted {status_counts.get('success', 0)}/{len(results)} calculations in {end_time - start_time:.2f} seconds.")
 
     summary_header = [
         f"Turbospectrum synthesis summary - {datetime.now().isoformat()}",
-        f"Total grid points: {len(grid_points)}",
+        f"Total grid points: {len(results)}",
         "Status counts: " + ", ".join(
             f"{status}={count}" for status, count in sorted(status_counts.items())
         ),
@@ -597,11 +1006,10 @@ def run_grid(config: TurbospectrumConfig, grid_points: List[Tuple]):
     print(f"Summary log written to {summary_path}")
 
 def main():
-    # Detect project root (assuming this script is in scripts/ or root)
-    # Adjust this logic if you move the script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir) if os.path.basename(script_dir) == "scripts" else script_dir
-    
+    # Project root detected once at module level (assuming this script is in
+    # scripts/ or root). Adjust PROJECT_ROOT if you move the script.
+    project_root = PROJECT_ROOT
+
     # Parse arguments manually to handle --force and config file
     args = sys.argv[1:]
     force_flag = False
@@ -624,11 +1032,12 @@ def main():
     if force_flag:
         config.force = True
     
-    # Load grid points from external file if specified
+    # Load grid points from external file if specified; the loader is a
+    # generator and run_grid streams it, so very large grids never need to be
+    # materialized in the parent.
     if config.grid_points_file:
         print(f"Loading grid points from file: {config.grid_points_file}")
-        grid_points = list(load_grid_points_from_csv(config.grid_points_file, config.project_root))
-        print(f"Loaded {len(grid_points)} grid points from file")
+        grid_points = load_grid_points_from_csv(config.grid_points_file, config.project_root)
     else:
         grid_points = config.grid_points
     
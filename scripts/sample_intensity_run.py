@@ -5,14 +5,11 @@ import sys
 script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(script_dir)
 
-from run_turbospectrum import TurbospectrumConfig, run_grid
+from run_turbospectrum import PROJECT_ROOT, TurbospectrumConfig, run_grid
 
 def main():
-    # Detect project root
-    project_root = os.path.dirname(script_dir)
-    
     # Initialize configuration
-    config = TurbospectrumConfig(project_root=project_root)
+    config = TurbospectrumConfig(project_root=PROJECT_ROOT)
     
     # Enable Intensity Calculation
     config.calculate_intensity = True
@@ -55,15 +52,15 @@ def main():
         print(f"Wavelength points: {len(data['wavelength'])}")
         if data['mode'] == 'Intensity':
             print(f"Mu points: {data['mu_points']}")
-            # Handle list or numpy array
-            shape_info = "List length: " + str(len(data['intensity_abs'][data['mu_points'][0]]))
+            # intensity_abs is a (nlambda, n_mu) array; per-angle views live
+            # in intensity_abs_by_mu.
             try:
-                shape_info = "Array shape: " + str(data['intensity_abs'][data['mu_points'][0]].shape)
-            except:
-                pass
+                shape_info = "Array shape: " + str(data['intensity_abs'].shape)
+            except AttributeError:
+                shape_info = "List length: " + str(len(data['intensity_abs_by_mu'][data['mu_points'][0]]))
             print(f"Intensity Abs Info: {shape_info}")
-            
-            val = data['intensity_abs'][data['mu_points'][0]][0]
+
+            val = data['intensity_abs_by_mu'][data['mu_points'][0]][0]
             print(f"Sample Intensity (mu={data['mu_points'][0]}): {val}")
             
     # Check one flux file
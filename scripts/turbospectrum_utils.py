@@ -1,14 +1,61 @@
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 
-def read_spectrum(filename):
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# Numba is optional: kernels below get a compiled version when it is
+# installed and a pure-NumPy fallback otherwise. cache=True persists the
+# compiled code on disk (honouring NUMBA_CACHE_DIR), so pool workers -
+# each a fresh interpreter - skip the JIT warmup after the first run.
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    njit = None
+    HAS_NUMBA = False
+
+# Header format: # mu-points   1.001800E-02  5.203500E-02 ...
+# Compiled once at import; read_spectrum is called per file across grids.
+_MU_POINTS_RE = re.compile(r'#\s*mu-points\s+(.*)')
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _pack_columns(data, cols):
+        """Gather the given columns of data into one contiguous (len(cols), n)
+        array in a single compiled pass."""
+        out = np.empty((cols.shape[0], data.shape[0]))
+        for j in range(cols.shape[0]):
+            c = cols[j]
+            for i in range(data.shape[0]):
+                out[j, i] = data[i, c]
+        return out
+else:
+    def _pack_columns(data, cols):
+        """Pure-NumPy fallback for the column gather when numba is absent."""
+        return np.ascontiguousarray(data[:, cols].T)
+
+def read_spectrum(filename, flux_only=False):
     """
     Reads a Turbospectrum output file (Flux or Intensity).
-    
+
     Parameters:
     -----------
     filename : str
         Path to the spectrum file.
-        
+    flux_only : bool
+        If True, parse only the wavelength/flux columns (0-2) and skip the
+        intensity columns entirely. Cuts the bytes parsed for wide
+        intensity files when the caller only needs fluxes.
+
     Returns:
     --------
     dict
@@ -17,86 +64,220 @@ def read_spectrum(filename):
         - 'flux_norm': list of floats
         - 'flux_abs': list of floats
         - 'mode': str ('Flux' or 'Intensity')
-        - 'mu_points': list of floats (only if mode='Intensity')
-        - 'intensity_abs': dict {mu: list of floats} (only if mode='Intensity')
-        - 'intensity_norm': dict {mu: list of floats} (only if mode='Intensity')
+
+        and, in Intensity mode unless flux_only is set:
+
+        - 'mu_points': array of floats (only if mode='Intensity')
+        - 'intensity_abs': ndarray of shape (nlambda, n_mu) (only if mode='Intensity');
+          column i corresponds to mu_points[i]
+        - 'intensity_norm': ndarray of shape (nlambda, n_mu) (only if mode='Intensity')
+        - 'intensity_abs_by_mu': dict {mu: 1D array view} (only if mode='Intensity')
+        - 'intensity_norm_by_mu': dict {mu: 1D array view} (only if mode='Intensity')
+
+    The 2D layout keeps all mu columns in one array so cross-mu operations
+    (limb-darkening fits, flux integration over mu) are single vectorized
+    calls; the *_by_mu dicts are zero-copy views for per-angle access.
     """
     
     with open(filename, 'r') as f:
-        lines = f.readlines()
-        
-    header_line = None
-    data_start = 0
-    for i, line in enumerate(lines):
-        if line.strip().startswith('#'):
-            header_line = line
-        elif line.strip():
-            data_start = i
-            break
-        
-    # Check for Intensity mode
-    is_intensity = False
-    mu_points = []
-    
-    if header_line and "mu-points" in header_line:
-        is_intensity = True
-        # Parse mu points
-        # Header format: # mu-points   1.001800E-02  5.203500E-02 ...
-        parts = header_line.split()
-        if "mu-points" in parts:
-            idx = parts.index("mu-points")
-            mu_points = [float(x) for x in parts[idx+1:]]
-            
+        # Read only the header line by line and remember the byte offset where
+        # the data starts, instead of materializing the whole file as a list.
+        header_line = None
+        data_offset = 0
+        while True:
+            pos = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            stripped = line.strip()
+            if stripped.startswith('#'):
+                header_line = line
+            elif stripped:
+                data_offset = pos
+                break
+
+        # Check for Intensity mode
+        is_intensity = False
+        mu_points = []
+
+        if header_line and "mu-points" in header_line:
+            is_intensity = True
+            mu_match = _MU_POINTS_RE.search(header_line)
+            if mu_match:
+                # Convert all mu values in one C-level pass (np.fromstring's
+                # text mode is deprecated, so split+np.array is the
+                # supported equivalent).
+                if np is not None:
+                    mu_points = np.array(mu_match.group(1).split(), dtype=np.float64)
+                else:
+                    mu_points = [float(x) for x in mu_match.group(1).split()]
+
+        # Binary cache: a .npy sidecar written on the first successful parse
+        # loads an order of magnitude faster than re-tokenizing the text.
+        # Only trusted when at least as new as the .spec file itself.
+        # mmap_mode='r' maps the array instead of copying it into RAM, so a
+        # multi-GB intensity grid only pages in the columns actually touched.
+        arr = None
+        from_cache = False
+        npy_path = filename + '.npy'
+        if np is not None:
+            try:
+                if os.path.getmtime(npy_path) >= os.path.getmtime(filename):
+                    arr = np.load(npy_path, mmap_mode='r')
+                    if arr.ndim != 2 or arr.size == 0:
+                        arr = None
+                    else:
+                        from_cache = True
+            except (OSError, ValueError):
+                arr = None
+
+        # Fastest path: the data block has a fixed column count, so one
+        # np.fromfile pass plus a reshape parses it without any tokenizer
+        # machinery. The column count comes from the first data line; a size
+        # mismatch (ragged lines, trailing junk) drops to the parsers below.
+        # Not used for flux_only, which needs column selection.
+        if arr is None and np is not None and not flux_only:
+            try:
+                f.seek(data_offset)
+                ncols = len(f.readline().split())
+                if ncols:
+                    with open(filename, 'rb') as fb:
+                        fb.seek(data_offset)
+                        flat = np.fromfile(fb, dtype=np.float64, sep=' ')
+                        # fromfile stops silently at the first bad token, so
+                        # only trust the result if it consumed the whole block.
+                        remainder = fb.read(16)
+                    if flat.size and flat.size % ncols == 0 and not remainder.strip():
+                        arr = flat.reshape(-1, ncols)
+            except (ValueError, OSError):
+                arr = None
+
+        # Fast path: parse the whole numeric block with one vectorized call
+        # from the already-open handle, positioned right after the header.
+        # pandas' C tokenizer is several times faster than np.loadtxt on
+        # whitespace-delimited numeric data, so prefer it when installed.
+        if arr is None and pd is not None and np is not None:
+            try:
+                f.seek(data_offset)
+                arr = pd.read_csv(f, sep=r'\s+', comment='#', header=None,
+                                  usecols=[0, 1, 2] if flux_only else None,
+                                  dtype=np.float64).to_numpy()
+                if arr.ndim != 2 or arr.size == 0:
+                    arr = None
+            except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError):
+                arr = None  # Ragged/malformed lines; fall back below
+        if arr is None and np is not None:
+            try:
+                f.seek(data_offset)
+                arr = np.loadtxt(f, comments='#', dtype=np.float64, ndmin=2,
+                                 usecols=(0, 1, 2) if flux_only else None)
+            except ValueError:
+                arr = None  # Ragged/malformed lines; fall back to the tolerant loop
+
+        if arr is not None and arr.size:
+            if not from_cache and not flux_only:
+                # A flux_only parse holds a truncated array; never let it
+                # shadow the full cache.
+                try:
+                    np.save(npy_path, arr)
+                except OSError:
+                    pass  # Read-only output directory; cache is best-effort
+            # One transpose copy turns the three strided flux columns into
+            # contiguous float64 rows in a single pass over the block,
+            # instead of three separate gathers.
+            flux_block = np.ascontiguousarray(arr[:, :3].T, dtype=np.float64)
+            result = {
+                'mode': 'Intensity' if is_intensity else 'Flux',
+                'wavelength': flux_block[0],
+                'flux_norm': flux_block[1],
+                'flux_abs': flux_block[2],
+            }
+            if is_intensity and not flux_only:
+                ncols = arr.shape[1]
+                abs_cols = [3 + 2 * i for i in range(len(mu_points)) if 3 + 2 * i < ncols]
+                norm_cols = [4 + 2 * i for i in range(len(mu_points)) if 4 + 2 * i < ncols]
+                result['mu_points'] = np.array(mu_points)
+                # Gather the interleaved mu columns with the (optionally
+                # numba-compiled) kernel; transposing back keeps the
+                # (nlambda, n_mu) shape while making each per-mu column view
+                # contiguous in memory.
+                result['intensity_abs'] = _pack_columns(
+                    arr, np.asarray(abs_cols, dtype=np.int64)).T
+                result['intensity_norm'] = _pack_columns(
+                    arr, np.asarray(norm_cols, dtype=np.int64)).T
+                result['intensity_abs_by_mu'] = {
+                    mu: result['intensity_abs'][:, i] for i, mu in enumerate(mu_points[:len(abs_cols)])
+                }
+                result['intensity_norm_by_mu'] = {
+                    mu: result['intensity_norm'][:, i] for i, mu in enumerate(mu_points[:len(norm_cols)])
+                }
+            return result
+
     # Initialize lists
     wavelength = []
     flux_norm = []
     flux_abs = []
-    
+
+    collect_intensity = is_intensity and not flux_only
     i_abs_lists = {mu: [] for mu in mu_points}
     i_norm_lists = {mu: [] for mu in mu_points}
-    
-    for line in lines[data_start:]:
-        parts = line.split()
-        if not parts:
-            continue
-            
+
+    # Column layout is fixed per file: intensity pairs start at column 3,
+    # i=0 -> cols 3, 4. Precompute the index tuples once instead of
+    # recomputing them per line.
+    abs_cols = tuple(3 + 2 * i for i in range(len(mu_points)))
+    norm_cols = tuple(4 + 2 * i for i in range(len(mu_points)))
+
+    # Fallback: tolerant per-line parse streamed straight from the data
+    # offset, without materializing the file as a list first.
+    with open(filename, 'r') as f:
+        f.seek(data_offset)
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+
+            try:
+                # One C-level pass over the whole line instead of a float()
+                # call per column.
+                floats = list(map(float, parts))
+
+                wavelength.append(floats[0])
+                flux_norm.append(floats[1])
+                flux_abs.append(floats[2])
+
+                if collect_intensity:
+                    n = len(floats)
+                    for mu, ca, cn in zip(mu_points, abs_cols, norm_cols):
+                        if ca < n:
+                            i_abs_lists[mu].append(floats[ca])
+                        if cn < n:
+                            i_norm_lists[mu].append(floats[cn])
+
+            except (ValueError, IndexError):
+                continue
+
+    # Convert to numpy arrays if available
+    i_abs = i_abs_lists
+    i_norm = i_norm_lists
+    if np is not None:
         try:
-            # Common columns
-            wavelength.append(float(parts[0]))
-            flux_norm.append(float(parts[1]))
-            flux_abs.append(float(parts[2]))
-            
-            if is_intensity:
-                for i, mu in enumerate(mu_points):
-                    # Columns are 0-indexed.
-                    # i=0 -> cols 3, 4
-                    col_abs = 3 + 2 * i
-                    col_norm = 4 + 2 * i
-                    
-                    if col_abs < len(parts):
-                        i_abs_lists[mu].append(float(parts[col_abs]))
-                    if col_norm < len(parts):
-                        i_norm_lists[mu].append(float(parts[col_norm]))
-                        
-        except (ValueError, IndexError):
-            continue
-
-    # Try to convert to numpy arrays if available
-    try:
-        import numpy as np
-        wavelength = np.array(wavelength)
-        flux_norm = np.array(flux_norm)
-        flux_abs = np.array(flux_abs)
-        if is_intensity:
-            mu_points = np.array(mu_points)
-            for mu in i_abs_lists:
-                i_abs_lists[mu] = np.array(i_abs_lists[mu])
-                i_norm_lists[mu] = np.array(i_norm_lists[mu])
-    except ImportError:
-        pass
-    except ValueError: 
-        # Catch the specific numpy error if it happens during import or usage
-        pass
+            wavelength = np.array(wavelength)
+            flux_norm = np.array(flux_norm)
+            flux_abs = np.array(flux_abs)
+            if collect_intensity:
+                # Assemble the same (nlambda, n_mu) layout as the fast path;
+                # falls back to the per-mu dicts if the columns came out
+                # ragged (short lines dropped some mu values).
+                i_abs = np.column_stack([i_abs_lists[mu] for mu in mu_points]) \
+                    if len(mu_points) else np.empty((len(wavelength), 0))
+                i_norm = np.column_stack([i_norm_lists[mu] for mu in mu_points]) \
+                    if len(mu_points) else np.empty((len(wavelength), 0))
+                mu_points = np.array(mu_points)
+        except ValueError:
+            # Catch the specific numpy error if it happens during usage
+            i_abs = i_abs_lists
+            i_norm = i_norm_lists
 
     result = {
         'mode': 'Intensity' if is_intensity else 'Flux',
@@ -104,22 +285,52 @@ def read_spectrum(filename):
         'flux_norm': flux_norm,
         'flux_abs': flux_abs
     }
-    
-    if is_intensity:
+
+    if collect_intensity:
         result['mu_points'] = mu_points
-        result['intensity_abs'] = i_abs_lists
-        result['intensity_norm'] = i_norm_lists
-        
+        result['intensity_abs'] = i_abs
+        result['intensity_norm'] = i_norm
+        if np is not None and isinstance(i_abs, np.ndarray):
+            result['intensity_abs_by_mu'] = {
+                mu: i_abs[:, i] for i, mu in enumerate(mu_points)
+            }
+            result['intensity_norm_by_mu'] = {
+                mu: i_norm[:, i] for i, mu in enumerate(mu_points)
+            }
+        else:
+            result['intensity_abs_by_mu'] = i_abs_lists
+            result['intensity_norm_by_mu'] = i_norm_lists
+
     return result
 
+def intensity_at(spectrum, mu, normalized=False):
+    """
+    Returns the intensity column for the mu angle closest to the requested
+    value, from a read_spectrum result in Intensity mode.
+
+    Uses a binary search over the sorted mu_points array, so it works for
+    arbitrary mu values without requiring an exact dictionary key match.
+    """
+    if spectrum.get('mode') != 'Intensity':
+        raise ValueError("intensity_at requires a spectrum read in Intensity mode")
+    mu_points = np.asarray(spectrum['mu_points'])
+    data = spectrum['intensity_norm' if normalized else 'intensity_abs']
+    i = int(np.searchsorted(mu_points, mu))
+    if i >= len(mu_points):
+        i = len(mu_points) - 1
+    elif i > 0 and mu - mu_points[i - 1] < mu_points[i] - mu:
+        i -= 1
+    return data[:, i]
+
 def load_all_spectra(directory):
     """
-    Loads all .spec files in a directory.
+    Loads all .spec files in a directory, reading files in parallel threads
+    (reading is I/O-dominated, so threads overlap the disk waits).
     Returns a dict mapping filename to the read result.
     """
-    results = {}
-    for f in os.listdir(directory):
-        if f.endswith(".spec"):
-            path = os.path.join(directory, f)
-            results[f] = read_spectrum(path)
-    return results
+    names = [f for f in os.listdir(directory) if f.endswith(".spec")]
+    if not names:
+        return {}
+    paths = [os.path.join(directory, f) for f in names]
+    with ThreadPoolExecutor(max_workers=min(32, len(paths))) as executor:
+        return dict(zip(names, executor.map(read_spectrum, paths)))
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import pathlib, sys
+import os, pathlib, sys
 
 # ----------------------------------------------------------------------
 # Paths – adjust only if you move the repository
@@ -9,6 +9,26 @@ model_dir = repo_root / "input_files/model_atmospheres/1D/marcs_standard_comp/ma
 model_list_file = model_dir / "model_list"
 gitignore_file = repo_root / ".gitignore"
 
+# Managed block markers: everything between them is owned by this script and
+# replaced wholesale on each run, which keeps repeated runs idempotent.
+BEGIN_MARKER = "# BEGIN-MODEL-LIST (managed by scripts/update_model_gitignore.py)"
+END_MARKER = "# END-MODEL-LIST"
+# Header line written by older versions of this script (block ran to EOF).
+LEGACY_MARKER = "# Keep ONLY the models listed in model_list"
+
+# Precomputed translation table for escaping gitignore-special leading chars.
+ESCAPE_TABLE = str.maketrans({'!': '\\!', '#': '\\#'})
+
+
+def _owned_filler(line):
+    """True for lines this script itself leaves directly above a block:
+    the blank separator or the legacy dashed header ('# ----')."""
+    stripped = line.strip()
+    if not stripped:
+        return True
+    return stripped.startswith('#') and stripped[1:].strip() != '' \
+        and set(stripped[1:].strip()) == {'-'}
+
 # ----------------------------------------------------------------------
 # Read model_list (ignore empty lines / comments)
 # ----------------------------------------------------------------------
@@ -23,31 +43,55 @@ with model_list_file.open() as f:
 # ----------------------------------------------------------------------
 # Build the .gitignore block
 # ----------------------------------------------------------------------
+model_rel = model_dir.relative_to(repo_root)
 ignore_block = [
-    "\n# -------------------------------------------------",
+    "",
+    BEGIN_MARKER,
     "# Keep ONLY the models listed in model_list",
-    "# -------------------------------------------------",
-    f"{model_dir.relative_to(repo_root) }/*"
+    f"{model_rel}/*",
 ]
-
-for fn in listed:
-    # Escape any leading ‘!’ or ‘#’ that might be part of the filename
-    escaped = fn.replace('!', '\\!').replace('#', '\\#')
-    ignore_block.append(f"!{model_dir.relative_to(repo_root)}/{escaped}")
+ignore_block.extend(f"!{model_rel}/{fn.translate(ESCAPE_TABLE)}" for fn in listed)
+ignore_block.append(END_MARKER)
 
 # ----------------------------------------------------------------------
-# Append (or replace) the block in .gitignore
+# Stream-rewrite .gitignore: copy everything outside the managed block to a
+# temp file, then append the fresh block with a single write and atomically
+# swap the result into place.
 # ----------------------------------------------------------------------
-gitignore_text = gitignore_file.read_text()
-# Simple approach: remove any previous block that starts with the marker line
-start_marker = "# Keep ONLY the models listed in model_list"
-if start_marker in gitignore_text:
-    before, _sep, _after = gitignore_text.partition(start_marker)
-    # keep everything before the old block, discard the old block, then add new one
-    new_gitignore = before.rstrip() + "\n" + "\n".join(ignore_block) + "\n"
-else:
-    # just append at the end
-    new_gitignore = gitignore_text.rstrip() + "\n" + "\n".join(ignore_block) + "\n"
+tmp_file = gitignore_file.with_suffix(".gitignore.tmp")
+with gitignore_file.open() as src, tmp_file.open('w') as dst:
+    skipping = False
+    pending = None  # one-line lookbehind so the separator above a block can be dropped too
+    for line in src:
+        stripped = line.strip()
+        if stripped == BEGIN_MARKER:
+            # Swallow the held-back line only if this script wrote it (the
+            # blank separator); a user's own entry right above the block
+            # must survive the rewrite.
+            if pending is not None and not _owned_filler(pending):
+                dst.write(pending)
+            skipping = True
+            pending = None
+            continue
+        if skipping:
+            if stripped == END_MARKER:
+                skipping = False
+            continue
+        if stripped == LEGACY_MARKER:
+            # Old-format block: it was always appended last, so everything
+            # from its dashed header onward is stale.
+            if pending is not None and not _owned_filler(pending):
+                dst.write(pending)
+            pending = None
+            break
+        if pending is not None:
+            dst.write(pending)
+        pending = line
+    if pending is not None:
+        if not pending.endswith("\n"):
+            pending += "\n"
+        dst.write(pending)
+    dst.write("\n".join(ignore_block) + "\n")
 
-gitignore_file.write_text(new_gitignore)
-print(f"Updated .gitignore with {len(listed)} model entries.")
\ No newline at end of file
+os.replace(tmp_file, gitignore_file)
+print(f"Updated .gitignore with {len(listed)} model entries.")